@@ -1,9 +1,20 @@
 import requests
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import threading
+
+try:
+    import orjson
+
+    def _loads(raw: bytes):
+        return orjson.loads(raw)
+except ImportError:  # orjson опционален — stdlib-фоллбек
+    def _loads(raw: bytes):
+        return json.loads(raw)
 from pathlib import Path
 import json
 from datetime import datetime
 from visualizer.viewer import ArenaVizProcess
-import time
 from model import GameState, Bomber, Mob
 
 TOKEN = "345c75ba-26c0-4f3e-acd4-09e63982ca52"
@@ -14,12 +25,43 @@ LOGS = BASE_URL + "logs"
 MOVE = BASE_URL + "move"
 ROUNDS = BASE_URL + "rounds"
 out_dir =  Path("out")
+DEBUG = False
+
+logging.basicConfig(level=logging.DEBUG if DEBUG else logging.INFO, format="%(message)s")
+log = logging.getLogger("jinglebang")
+
+
+class LazyJson:
+    """Отложенный разбор и сериализация ответа: и .json(), и json.dumps
+    выполнятся только если запись реально уходит в хендлер (см. log.debug
+    ниже). Не-JSON тело (ошибка сервера) печатаем как есть."""
+
+    def __init__(self, response):
+        self._response = response
+
+    def __str__(self) -> str:
+        try:
+            data = self._response.json()
+        except ValueError:
+            return self._response.text
+        return json.dumps(data, ensure_ascii=False, indent=2)
 
 HEADERS = {
     "accept": "application/json",
     "X-Auth-Token" : TOKEN
 }
 
+# Одна сессия на весь процесс: переиспользуем TCP/TLS соединение вместо
+# нового handshake на каждый тик.
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+SESSION.mount("https://", requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=2))
+
+# Пейсинг цикла опроса: wait() вместо time.sleep, чтобы цикл можно было
+# прервать мгновенно (например, из сигнал-хендлера через _stop.set()).
+_stop = threading.Event()
+POLL_INTERVAL = 1.0
+
 
 def save_response_json(
     response,
@@ -28,7 +70,7 @@ def save_response_json(
     prefix: str = "response",
     out_dir: str | Path = ".",
     add_timestamp: bool = True,
-    indent: int = 2,
+    indent: int | None = 2,
 ) -> Path:
     """
     Сохраняет response.json() в файл.
@@ -51,20 +93,33 @@ def save_response_json(
     return path
 
 
+def _log_dump_result(future) -> None:
+    """Колбэк фоновой записи дампа: ошибку — в лог, путь — на DEBUG."""
+    try:
+        path = future.result()
+    except Exception:
+        log.exception("не удалось сохранить дамп арены")
+    else:
+        log.debug("сохранено: %s", path)
+
+
 out_dir.mkdir(parents=True, exist_ok=True)
 
 
-response = requests.get(ROUNDS, headers=HEADERS)
-print(response.text)
+response = SESSION.get(ROUNDS, timeout=10)
+log.debug("rounds: %s", LazyJson(response))
 
 
 if __name__ == "__main__":
     viewer = ArenaVizProcess()
     viewer.start()
 
-    while True:
-        response = requests.get(ARENA, headers=HEADERS)
-        viewer.set_state(json.loads(response.text))
-        path = save_response_json(response, prefix="arena", out_dir="dump")
-        print("Saved to:", path)
-        time.sleep(1.0)
+    # Дамп на диск — в фоне, чтобы запись не задерживала следующий запрос.
+    io_pool = ThreadPoolExecutor(max_workers=2)
+
+    while not _stop.is_set():
+        response = SESSION.get(ARENA, timeout=10)
+        viewer.set_state(_loads(response.content))
+        io_pool.submit(save_response_json, response, prefix="arena", out_dir="dump",
+                       indent=2 if DEBUG else None).add_done_callback(_log_dump_result)
+        _stop.wait(POLL_INTERVAL)
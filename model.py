@@ -7,7 +7,7 @@ from typing import Any, Dict, List, Tuple
 Pos = Tuple[int, int]
 
 
-@dataclass
+@dataclass(slots=True)
 class Bomber:
     id: str
     alive: bool
@@ -44,7 +44,7 @@ class Bomber:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class Mob:
     id: str
     type: str
@@ -69,7 +69,7 @@ class Mob:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class Arena:
     obstacles: List[Pos]
     walls: List[Pos]
@@ -91,7 +91,7 @@ class Arena:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class GameState:
     player: str
     round: str
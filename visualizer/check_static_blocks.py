@@ -0,0 +1,44 @@
+"""Headless-проверка композитного слоя стен/препятствий.
+
+Два тика с разными сетками: после второго число точек в блоке препятствий
+должно поменяться именно в контейнере, который рендерит mapper, а цвета
+блоков — остаться на месте. Ловит регрессию, при которой обновления уходят
+в MultiBlock, на который VTK не смотрит (add_composite рендерит копию).
+
+Запуск: python -m visualizer.check_static_blocks  (окно не открывается).
+"""
+
+import numpy as np
+import pyvista as pv
+
+from visualizer.viewer import Arena2DViewerMeshes, Player
+
+
+def main() -> None:
+    pv.OFF_SCREEN = True
+    viewer = Arena2DViewerMeshes()
+
+    grid = np.zeros((8, 8), dtype=np.int32)
+    grid[0, :] = 1
+    grid[3, 3] = 2
+    grid[4, 4] = 2
+    viewer.update_state(grid, [Player(1, 1)])
+
+    rendered = viewer._static_actor.mapper.dataset
+    n_obs = rendered[1].n_points
+    assert n_obs > 0, "препятствия не попали в сцену"
+
+    grid[4, 4] = 0  # одно препятствие разрушили
+    viewer.update_state(grid, [Player(1, 1)])
+
+    assert rendered[1].n_points < n_obs, "mapper рендерит устаревший контейнер"
+    attr = viewer._static_actor.mapper.block_attr
+    assert attr[1].color is not None, "цвет стен сброшен обновлением"
+    assert attr[2].color is not None, "цвет препятствий сброшен обновлением"
+
+    viewer.close_window()
+    print("ok: блоки обновляются на месте, цвета на месте")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,11 @@ from typing import Iterable, Sequence
 
 import numpy as np
 import pyvista as pv
+import vtk
+
+# Настройка темы глобальная — выставляем один раз на импорт модуля,
+# а не как побочный эффект каждого __init__.
+pv.global_theme.allow_empty_mesh = True
 
 
 @dataclass(frozen=True)
@@ -16,71 +21,98 @@ class Player:
     x: int
     y: int
 
+import sys
 import time
-import queue
 import multiprocessing as mp
-
-
-def _viz_process_main(state_q: mp.Queue, stop, cell_size: float = 1.0):
+from multiprocessing import shared_memory
+
+
+# Разметка разделяемой памяти между процессом-поставщиком и вьюером:
+# int32-заголовок [h, w, n_players], затем позиции игроков, затем int8-сетка.
+# Состояние передаётся без pickle: поставщик пишет массивы на месте и
+# сигналит событием, вьюер копирует их под коротким локом.
+_SHM_MAX_SIDE = 256
+_SHM_MAX_PLAYERS = 16
+_SHM_HDR_BYTES = 3 * 4
+_SHM_PLAYERS_BYTES = _SHM_MAX_PLAYERS * 2 * 4
+_SHM_SIZE = _SHM_HDR_BYTES + _SHM_PLAYERS_BYTES + _SHM_MAX_SIDE * _SHM_MAX_SIDE
+
+
+def _shm_views(buf):
+    hdr = np.ndarray((3,), np.int32, buffer=buf)
+    players = np.ndarray((_SHM_MAX_PLAYERS, 2), np.int32, buffer=buf, offset=_SHM_HDR_BYTES)
+    grid = np.ndarray(
+        (_SHM_MAX_SIDE * _SHM_MAX_SIDE,), np.int8,
+        buffer=buf, offset=_SHM_HDR_BYTES + _SHM_PLAYERS_BYTES,
+    )
+    return hdr, players, grid
+
+
+def _grid_from_state(state, dtype=np.int32) -> np.ndarray:
+    """Сетка (H, W) из JSON состояния арены: один scatter на слой."""
+    w, h = state["map_size"][0], state["map_size"][1]
+    grid = np.zeros((h, w), dtype=dtype)
+    obs = np.asarray(state["arena"].get("obstacles") or [], dtype=np.int32).reshape(-1, 2)
+    grid[obs[:, 1], obs[:, 0]] = 2
+    walls = np.asarray(state["arena"].get("walls") or [], dtype=np.int32).reshape(-1, 2)
+    grid[walls[:, 1], walls[:, 0]] = 1
+    return grid
+
+
+def _viz_process_main(shm_name: str, lock, new_state, stop, cell_size: float = 1.0):
     # Внутри процесса импортируем pyvista (лучше так, чем вверху файла)
     import pyvista as pv
 
+    shm = shared_memory.SharedMemory(name=shm_name)
+    hdr, players_arr, grid_arr = _shm_views(shm.buf)
+
     # твой класс
     viewer = Arena2DViewerMeshes(cell_size=cell_size)
 
     viewer.show_window(block=False)
 
-    latest_grid = None
-    latest_players = None
-
     target_dt = 1.0 / 60.0  # 60 FPS
-    last_frame = time.perf_counter()
 
     while not stop.is_set():
-        # 1) Забираем ВСЕ обновления из очереди, оставляем только последнее
-        try:
-            while True:
-                msg = state_q.get_nowait()
-                if msg is None:          # sentinel на закрытие
-                    stop.set()
-                    break
-                if msg["type"] == "state":
-                    latest_grid = msg["grid"]
-                    latest_players = msg.get("players", [])
-                elif msg["type"] == "close":
-                    stop.set()
-                    break
-        except queue.Empty:
-            pass
-
-        # 2) Применяем последнее состояние (если оно пришло)
-        if latest_grid is not None:
-            viewer.update_state_json(latest_grid)
-            latest_grid = None  # применили — сбросили
-
-        # 3) Плавный рендер/ивенты каждый кадр
+        # 1) Ждём сигнал «состояние обновилось»; wait заодно задаёт пейсинг кадра
+        dirty = new_state.wait(timeout=target_dt)
+        if dirty:
+            # 2) Копируем состояние из shm под коротким локом и применяем
+            with lock:
+                new_state.clear()
+                h, w, n = int(hdr[0]), int(hdr[1]), int(hdr[2])
+                grid = grid_arr[: h * w].reshape(h, w).astype(np.int32)
+                players = [Player(int(x), int(y)) for x, y in players_arr[:n]]
+            viewer.update_state(grid, players)
+
+        # 3) Рендерим только если состояние менялось; иначе лишь качаем ивенты
         if viewer._plotter is not None:
-            viewer._plotter.update()
-
-        # 4) ограничение FPS
-        now = time.perf_counter()
-        dt = now - last_frame
-        if dt < target_dt:
-            time.sleep(target_dt - dt)
-        last_frame = now
+            viewer._plotter.update(stime=1, force_redraw=dirty)
 
     viewer.close_window()
+    # ndarray-вьюхи держат буфер экспортированным — отпускаем их перед close()
+    del hdr, players_arr, grid_arr
+    shm.close()
 
 
 class ArenaVizProcess:
     def __init__(self, cell_size: float = 1.0):
-        # На macOS/Windows лучше spawn, VTK/GUI с fork часто чудит
-        self._ctx = mp.get_context("spawn")
-        self._q: mp.Queue = self._ctx.Queue(maxsize=5)   # маленькая, чтобы не копить лаг
+        # На macOS/Windows нужен spawn (VTK/GUI с fork часто чудит). На Linux
+        # forkserver даёт уже прогретый интерпретатор — вьюер стартует заметно
+        # быстрее, чем при полном реимпорте numpy/pyvista в spawn-ребёнке.
+        if sys.platform.startswith("linux"):
+            self._ctx = mp.get_context("forkserver")
+            self._ctx.set_forkserver_preload(["numpy"])
+        else:
+            self._ctx = mp.get_context("spawn")
+        self._shm = shared_memory.SharedMemory(create=True, size=_SHM_SIZE)
+        self._hdr, self._players, self._grid = _shm_views(self._shm.buf)
+        self._lock = self._ctx.Lock()
+        self._new_state = self._ctx.Event()
         self._stop: mp.Event = self._ctx.Event()
         self._p: mp.Process = self._ctx.Process(
             target=_viz_process_main,
-            args=(self._q, self._stop, cell_size),
+            args=(self._shm.name, self._lock, self._new_state, self._stop, cell_size),
             daemon=True,
         )
 
@@ -88,33 +120,43 @@ class ArenaVizProcess:
         self._p.start()
 
     def set_state(self, jsonka):
-        """
-        grid: list[list[int]]
-        players_xy: list[tuple[int,int]]  например [(1,1),(4,3)]
-        """
-        msg = {"type": "state", "grid": jsonka}
+        """Пишет состояние арены в разделяемую память (pickle на тик не платим).
 
-        # Если очередь забита, выбрасываем старое состояние — чтобы не лагало
-        try:
-            self._q.put_nowait(msg)
-        except queue.Full:
-            try:
-                _ = self._q.get_nowait()
-            except queue.Empty:
-                pass
-            try:
-                self._q.put_nowait(msg)
-            except queue.Full:
-                pass
+        jsonka — сырой JSON-ответ /api/arena.
+        """
+        grid = _grid_from_state(jsonka, dtype=np.int8)
+        h, w = grid.shape
+        if h > _SHM_MAX_SIDE or w > _SHM_MAX_SIDE:
+            raise ValueError(f"арена {w}x{h} больше буфера {_SHM_MAX_SIDE}x{_SHM_MAX_SIDE}")
+
+        bombers = jsonka.get("bombers") or []
+        pxy = np.asarray(
+            [b["pos"] for b in bombers[:_SHM_MAX_PLAYERS]], dtype=np.int32
+        ).reshape(-1, 2)
+
+        with self._lock:
+            self._hdr[0] = h
+            self._hdr[1] = w
+            self._hdr[2] = pxy.shape[0]
+            self._players[: pxy.shape[0]] = pxy
+            self._grid[: h * w] = grid.ravel()
+        self._new_state.set()
 
     def close(self):
-        try:
-            self._q.put_nowait({"type": "close"})
-        except Exception:
-            pass
         self._stop.set()
+        self._new_state.set()  # разбудить wait во вьюере
         if self._p.is_alive():
             self._p.join(timeout=2.0)
+        # Пока живы ndarray-вьюхи, буфер экспортирован и close() падает с
+        # BufferError; unlink в finally, чтобы не течь сегментом в /dev/shm.
+        del self._hdr, self._players, self._grid
+        try:
+            self._shm.close()
+        finally:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
 
 
 # class Arena2DViewer:
@@ -335,28 +377,47 @@ class Arena2DViewerMeshes:
         PLAYER = 3
 
     def __init__(self, cell_size: float = 1.0, wall_h: float = 1.0, obstacle_h: float = 0.6):
-        pv.global_theme.allow_empty_mesh = True
         self.cell_size = float(cell_size)
         self.wall_h = float(wall_h)
         self.obstacle_h = float(obstacle_h)
 
+        # геометрию глифов строим один раз — не тесселлируем куб/сферу на каждом кадре
+        self._wall_cube = pv.Cube(
+            center=(0, 0, 0),
+            x_length=self.cell_size,
+            y_length=self.cell_size,
+            z_length=self.wall_h,
+        )
+        self._obstacle_cube = pv.Cube(
+            center=(0, 0, 0),
+            x_length=self.cell_size,
+            y_length=self.cell_size,
+            z_length=self.obstacle_h,
+        )
+        self._player_sphere = pv.Sphere(radius=self.cell_size * 0.28, center=(0, 0, 0))
+
         self._plotter: pv.Plotter | None = None
         self._shown = False
         self._shape: tuple[int, int] | None = None
 
         self._floor_actor = None
-        self._walls_actor = None
-        self._obstacles_actor = None
-        self._players_actor = None
+        # стены + препятствия одним композитным актором (см. _set_static_blocks)
+        self._static_mb: pv.MultiBlock | None = None
+        self._static_actor = None
+        # живой глиф-пайплайн игроков (см. _ensure_player_pipeline)
+        self._players_src: pv.PolyData | None = None
+        self._players_vtk_actor = None
+        # отпечаток статичного слоя: пока стены/препятствия не менялись,
+        # их глифы не пересобираем
+        self._grid_sig: tuple | None = None
 
     # --- API ---
     def show_window(self, block: bool = False) -> None:
         if self._plotter is None:
             self._plotter = pv.Plotter(title="Arena (Meshes)")
 
-        # если ничего не задавали — пустая сцена 1x1
-        if self._shape is None:
-            self.update_state([[0]], [])
+        # Сцену не строим заранее: первая реальная update_state соберёт пол
+        # сразу под настоящий размер арены, без выбрасывания заглушки 1x1.
 
         # 2D-вид сверху, но с “высотой” объектов
         self._plotter.view_xy()
@@ -367,28 +428,20 @@ class Arena2DViewerMeshes:
         self._shown = not block
 
     def update_state_json(self, grid):
-        obstacles = grid["arena"]["obstacles"]
-        walls = grid["arena"]["walls"]
-        # arenaWidth = max(map(lambda a: a[0], obstacles)) + 1
-        # arenaHeight = max(map(lambda a: a[1], obstacles)) + 1        
-        arenaWidth = grid["map_size"][0]
-        arenaHeight = grid["map_size"][1]
-
-        curMap = [[0 for _ in range(arenaHeight)] for _ in range(arenaWidth)]
-        for cur in obstacles:
-            curMap[cur[0]][cur[1]] = 2
-        for cur in walls:
-            curMap[cur[0]][cur[1]] = 1
-            
+        curMap = _grid_from_state(grid)
         players = [Player(1, 1), Player(4, 3)]
-
         self.update_state(curMap, players)
 
 
     def update_state(self, grid: Sequence[Sequence[int]], players: Iterable[Player]) -> None:
-        grid_np = np.asarray(grid, dtype=np.int32)
-        if grid_np.ndim != 2 or grid_np.size == 0:
-            raise ValueError("grid должен быть непустым 2D массивом")
+        # fast-path: update_state_json уже отдаёт готовый int32 ndarray —
+        # не платим за диспетчеризацию np.asarray на каждом кадре
+        if type(grid) is np.ndarray and grid.dtype == np.int32 and grid.ndim == 2 and grid.size:
+            grid_np = grid
+        else:
+            grid_np = np.asarray(grid, dtype=np.int32)
+            if grid_np.ndim != 2 or grid_np.size == 0:
+                raise ValueError("grid должен быть непустым 2D массивом")
 
         rows, cols = grid_np.shape
         if self._plotter is None:
@@ -400,36 +453,34 @@ class Arena2DViewerMeshes:
             self._plotter.clear()
             self._build_floor(rows, cols)
             # акторы под динамику “обнулим”
-            self._walls_actor = None
-            self._obstacles_actor = None
-            self._players_actor = None
-
-        # 1) стены
-        walls_pts = self._cells_to_points(grid_np == 1)
-        walls_mesh = self._glyph_cubes(walls_pts, z=self.wall_h / 2.0, height=self.wall_h)
-
-        if self._walls_actor is not None:
-            self._plotter.remove_actor(self._walls_actor)
-        self._walls_actor = self._plotter.add_mesh(walls_mesh, color="slategray")
-
-        # 2) препятствия
-        obs_pts = self._cells_to_points(grid_np == 2)
-        obs_mesh = self._glyph_cubes(obs_pts, z=self.obstacle_h / 2.0, height=self.obstacle_h)
-
-        if self._obstacles_actor is not None:
-            self._plotter.remove_actor(self._obstacles_actor)
-        self._obstacles_actor = self._plotter.add_mesh(obs_mesh, color="sienna")
-
-        # 3) игроки
-        pl_pts = []
-        for p in players:
-            if 0 <= p.x < cols and 0 <= p.y < rows:
-                pl_pts.append(((p.x + 0.5) * self.cell_size, (p.y + 0.5) * self.cell_size))
-        pl_mesh = self._glyph_spheres(np.asarray(pl_pts, dtype=np.float32), z=0.35)
-
-        if self._players_actor is not None:
-            self._plotter.remove_actor(self._players_actor)
-        self._players_actor = self._plotter.add_mesh(pl_mesh, color="crimson")
+            self._static_mb = None
+            self._static_actor = None
+            self._grid_sig = None
+            self._players_src = None
+            self._players_vtk_actor = None
+
+        # 1)-2) стены и препятствия — только если сетка реально поменялась
+        sig = (grid_np.shape, hash(grid_np.tobytes()))
+        if sig != self._grid_sig:
+            self._grid_sig = sig
+
+            walls_pts, obs_pts = self._static_pts3(grid_np)
+            self._set_static_blocks(
+                self._glyph(walls_pts, self._wall_cube),
+                self._glyph(obs_pts, self._obstacle_cube),
+            )
+
+        # 3) игроки — один векторный проход вместо питоновского цикла
+        pxy = np.fromiter(
+            (c for p in players for c in (p.x, p.y)), dtype=np.int32
+        ).reshape(-1, 2)
+        ok = (pxy[:, 0] >= 0) & (pxy[:, 0] < cols) & (pxy[:, 1] >= 0) & (pxy[:, 1] < rows)
+        pl_pts = np.empty((int(ok.sum()), 3), dtype=np.float32)
+        pl_pts[:, :2] = (pxy[ok].astype(np.float32) + 0.5) * self.cell_size
+        pl_pts[:, 2] = 0.35
+        self._ensure_player_pipeline()
+        self._players_src.points = pl_pts
+        self._players_src.Modified()
 
         # рендер кадра (если окно неблокирующее)
         # if self._shown and self._plotter is not None:
@@ -442,57 +493,124 @@ class Arena2DViewerMeshes:
         self._shown = False
         self._shape = None
         self._floor_actor = None
-        self._walls_actor = None
-        self._obstacles_actor = None
-        self._players_actor = None
+        self._static_mb = None
+        self._static_actor = None
+        self._grid_sig = None
+        self._players_src = None
+        self._players_vtk_actor = None
 
     # --- internals ---
+    def _ensure_player_pipeline(self) -> None:
+        """Живой vtkGlyph3D для игроков, собирается один раз.
+
+        Дальше на каждом кадре меняются только точки источника — фильтр сам
+        переглифует сферы, актор и маппер не трогаем даже при смене числа
+        игроков. Пересоздавать актор игроков (remove_actor + add_mesh) на
+        каждый кадр больше не нужно."""
+        if self._players_src is not None:
+            return
+        assert self._plotter is not None
+
+        self._players_src = pv.PolyData(np.empty((0, 3), dtype=np.float32))
+
+        glyph = vtk.vtkGlyph3D()
+        glyph.SetSourceData(self._player_sphere)
+        glyph.SetInputData(self._players_src)
+        glyph.SetScaleModeToDataScalingOff()
+        glyph.OrientOff()
+
+        mapper = vtk.vtkPolyDataMapper()
+        mapper.SetInputConnection(glyph.GetOutputPort())
+        actor = vtk.vtkActor()
+        actor.SetMapper(mapper)
+        actor.GetProperty().SetColor(*pv.Color("crimson").float_rgb)
+
+        self._plotter.add_actor(actor)
+        self._players_vtk_actor = actor
+
+    def _set_static_blocks(self, walls_mesh: pv.PolyData, obs_mesh: pv.PolyData) -> None:
+        """Стены и препятствия живут в одном композитном акторе.
+
+        Один mapper на оба слоя — вдвое меньше объектов сцены, которые VTK
+        синкает на каждом кадре. Обновление мутирует блоки на месте; актор
+        создаётся один раз."""
+        assert self._plotter is not None
+        if self._static_mb is None:
+            self._static_actor, mapper = self._plotter.add_composite(
+                pv.MultiBlock([walls_mesh, obs_mesh]), show_scalar_bar=False
+            )
+            # add_composite прогоняет переданный MultiBlock через
+            # as_polydata_blocks и рендерит получившуюся копию — держим
+            # именно её, иначе обновления уйдут в контейнер, на который
+            # VTK не смотрит.
+            self._static_mb = mapper.dataset
+            # block_attr[0] — корень мультиблока, дальше блоки по порядку
+            mapper.block_attr[1].color = "slategray"
+            mapper.block_attr[2].color = "sienna"
+        else:
+            # Мутируем существующие блоки, не подменяя объекты: цвета в
+            # block_attr ключуются по объекту блока, replace() сбросил бы их.
+            self._static_mb[0].copy_from(walls_mesh, deep=False)
+            self._static_mb[1].copy_from(obs_mesh, deep=False)
+            self._static_mb.Modified()
+
     def _build_floor(self, rows: int, cols: int) -> None:
         assert self._plotter is not None
-        w = cols * self.cell_size
-        h = rows * self.cell_size
-
-        floor = pv.Plane(
-            center=(w / 2.0, h / 2.0, 0.0),
-            i_size=w,
-            j_size=h,
-            i_resolution=cols,
-            j_resolution=rows,
-            direction=(0, 0, 1),
+        # Точки и квады пола строим напрямую из NumPy: один mgrid и один
+        # бродкаст вместо прогонки pv.Plane-пайплайна на (rows+1)(cols+1) вершин.
+        # Клетки идут row-major — ровно в порядке grid.ravel().
+        yy, xx = np.mgrid[0 : rows + 1, 0 : cols + 1].astype(np.float32) * self.cell_size
+        pts = np.column_stack([xx.ravel(), yy.ravel(), np.zeros(xx.size, np.float32)])
+
+        v0 = (
+            np.arange(rows, dtype=np.int64)[:, None] * (cols + 1)
+            + np.arange(cols, dtype=np.int64)
+        ).ravel()
+        faces = np.empty((rows * cols, 5), dtype=np.int64)
+        faces[:, 0] = 4
+        faces[:, 1] = v0
+        faces[:, 2] = v0 + 1
+        faces[:, 3] = v0 + cols + 2
+        faces[:, 4] = v0 + cols + 1
+
+        floor = pv.PolyData(pts, faces=faces.ravel())
+        # вид строго сверху в ортографике — освещению тут нечего считать
+        self._floor_actor = self._plotter.add_mesh(
+            floor,
+            color="white",
+            show_edges=True,
+            opacity=0.25,
+            lighting=False,
+            ambient=1.0,
         )
-        self._floor_actor = self._plotter.add_mesh(floor, color="white", show_edges=True, opacity=0.25)
         self._plotter.view_xy()                      # камера строго сверху
         self._plotter.enable_parallel_projection()   # ортографика (как карта)
         self._plotter.enable_2d_style()              # ВАЖНО: отключает вращение, оставляет pan/zoom
 
-    def _cells_to_points(self, mask: np.ndarray) -> np.ndarray:
-        """mask shape (rows, cols) -> точки центров клеток (N, 2)."""
-        ys, xs = np.nonzero(mask)
-        if xs.size == 0:
-            return np.empty((0, 2), dtype=np.float32)
-        pts = np.stack([(xs + 0.5) * self.cell_size, (ys + 0.5) * self.cell_size], axis=1)
-        return pts.astype(np.float32, copy=False)
-
-    def _glyph_cubes(self, xy: np.ndarray, z: float, height: float) -> pv.PolyData:
-        if xy.size == 0:
-            return pv.PolyData()  # пусто — просто не будет кубов
-        pts3 = np.column_stack([xy, np.full((xy.shape[0],), z, dtype=np.float32)])
-        cloud = pv.PolyData(pts3)
-        cube = pv.Cube(
-            center=(0, 0, 0),
-            x_length=self.cell_size,
-            y_length=self.cell_size,
-            z_length=height,
-        )
-        return cloud.glyph(geom=cube, scale=False, orient=False)
-
-    def _glyph_spheres(self, xy: np.ndarray, z: float) -> pv.PolyData:
-        if xy.size == 0:
-            return pv.PolyData()
-        pts3 = np.column_stack([xy, np.full((xy.shape[0],), z, dtype=np.float32)])
+    def _static_pts3(self, grid: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Центры стен и препятствий (N, 3) float32 за один проход по сетке.
+
+        Ненулевые клетки извлекаются одним flatnonzero, x/y считаются сразу
+        для обоих слоёв и только потом делятся по коду — сетка сканируется
+        один раз вместо прохода на каждый тип клетки."""
+        flat = grid.ravel()
+        idx = np.flatnonzero(flat)
+        codes = flat[idx]
+        cols = grid.shape[1]
+        pts = np.empty((idx.size, 3), dtype=np.float32)
+        pts[:, 0] = (idx % cols + 0.5) * self.cell_size
+        pts[:, 1] = (idx // cols + 0.5) * self.cell_size
+        walls = pts[codes == 1]
+        walls[:, 2] = self.wall_h / 2.0
+        obs = pts[codes == 2]
+        obs[:, 2] = self.obstacle_h / 2.0
+        return walls, obs
+
+    def _glyph(self, pts3: np.ndarray, geom: pv.PolyData) -> pv.PolyData:
+        if pts3.size == 0:
+            return pv.PolyData()  # пусто — просто не будет глифов
         cloud = pv.PolyData(pts3)
-        sphere = pv.Sphere(radius=self.cell_size * 0.28, center=(0, 0, 0))
-        return cloud.glyph(geom=sphere, scale=False, orient=False)
+        return cloud.glyph(geom=geom, scale=False, orient=False)
 
 
 # ------------------ пример использования ------------------